@@ -3,8 +3,7 @@
 import streamlit as st
 from datetime import datetime
 import pandas as pd
-import json
-from pathlib import Path
+from data_store import DataStore
 
 
 st.set_page_config(
@@ -44,62 +43,48 @@ st.markdown("""
 st.markdown("<h1 style='text-align: center; color: #2d4d2d;'>The Real Money Isn't Made by Catching Every Little Wave</h1>", unsafe_allow_html=True)
 st.markdown("<p style='text-align: center; color: #666;'>Wait for the Right Setup</p>", unsafe_allow_html=True)
 
-# Load data from file (updated by scheduled job, no API calls)
-# Use file modification time as cache key so it auto-refreshes when file changes
-@st.cache_data(ttl=60)  # Short TTL as backup, but file_mtime is the real key
-def load_dividend_data(file_mtime: float = 0):
-    """Load dividend data from file (no API calls)
-    
-    Args:
-        file_mtime: File modification time - when this changes, cache invalidates
-    """
-    try:
-        latest_file = Path("data/latest.json")
-        if latest_file.exists():
-            with open(latest_file, 'r') as f:
-                data = json.load(f)
-            df = pd.DataFrame(data)
-            # Convert date strings back to datetime
-            if 'next_div_date' in df.columns:
-                df['next_div_date'] = pd.to_datetime(df['next_div_date'], errors='coerce')
-            # Convert ex_dividend_date from Unix timestamp to datetime (if it's numeric)
-            if 'ex_dividend_date' in df.columns:
-                # Check if it's already a datetime or still a Unix timestamp
-                if df['ex_dividend_date'].dtype in ['int64', 'float64']:
-                    df['ex_dividend_date'] = pd.to_datetime(df['ex_dividend_date'], unit='s', errors='coerce')
-                else:
-                    df['ex_dividend_date'] = pd.to_datetime(df['ex_dividend_date'], errors='coerce')
-            return df
-        else:
-            st.warning("⚠️ No data file found. Waiting for scheduled update...")
-            return pd.DataFrame()
-    except Exception as e:
-        st.error(f"Error loading data: {str(e)}")
-        return pd.DataFrame()
+# One data store per process, shared by every viewer. Its watcher thread
+# hot-swaps the data when the scheduled job rewrites data/latest.json,
+# so reruns just read the current snapshot (no stat, no reload, no API calls).
+@st.cache_resource
+def get_data_store() -> DataStore:
+    return DataStore().start()
+
+
+store = get_data_store()
+
+# Current snapshot (only waits right after process start, before the first load)
+with st.spinner("🔄 Loading dividend data..."):
+    store.wait_until_ready(timeout=10)
+snapshot = store.snapshot()
 
 
 # Sidebar for controls
 with st.sidebar:
     st.header("⚙️ Controls")
     
+    # Only re-renders with the latest snapshot - reloads happen in the background
     if st.button("🔄 Refresh Data", use_container_width=True):
-        st.cache_data.clear()
         st.rerun()
     
     st.info("📅 Data updates daily via scheduled job")
-    st.caption("Last update: Check GitHub Actions")
+    if snapshot.file_mtime:
+        st.caption(f"Data file: {datetime.fromtimestamp(snapshot.file_mtime):%Y-%m-%d %H:%M}")
+    else:
+        st.caption("Last update: Check GitHub Actions")
     
     st.divider()
     st.caption(f"Last updated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
 
 
-# Load data from file (no API calls - updated daily via GitHub Actions)
-# Get file modification time to use as cache key (changes when GitHub Actions updates file)
-latest_file = Path("data/latest.json")
-file_mtime = latest_file.stat().st_mtime if latest_file.exists() else 0
-
-with st.spinner("🔄 Loading dividend data..."):
-    df = load_dividend_data(file_mtime=file_mtime)
+if snapshot.error:
+    st.error(f"Error loading data: {snapshot.error}")
+if snapshot.file_mtime is None:
+    st.warning("⚠️ No data file found. Waiting for scheduled update...")
+if snapshot.meta.get('partial'):
+    st.warning(f"⏰ Partial scan: the time budget ran out ({snapshot.meta.get('skipped_tickers', 0)} tickers unchecked); the next run picks up where it stopped")
+# Copy - the formatting below modifies columns in place
+df = snapshot.df.copy()
 
 
 # Handle empty state
@@ -111,22 +96,23 @@ if df.empty:
 # ACTIONABLE INSIGHT METRICS - Find specific opportunities
 col1, col2, col3, col4 = st.columns(4)
 
-# Helper function to safely get stock info from pandas Series
-def get_stock_info(row):
+# Metric cards are picked once by the pipeline (ranking.headline_picks) - just look them up
+headlines = snapshot.headlines
+
+def get_stock_info(pick):
     """Safely extract stock information with defaults"""
     return {
-        'code': row.get('code', 'N/A') if 'code' in row.index else 'N/A',
-        'yield': row.get('dividend_yield', 0) if 'dividend_yield' in row.index else 0,
-        'days': row.get('days_until_exdiv', 0) if 'days_until_exdiv' in row.index else 0,
-        'beta': row.get('beta', 0) if 'beta' in row.index else 0,
-        'pct': row.get('pct_from_52w_low', 0) if 'pct_from_52w_low' in row.index else 0,
+        'code': pick.get('code') or 'N/A',
+        'yield': pick.get('dividend_yield') or 0,
+        'days': pick.get('days_until_exdiv') or 0,
+        'beta': pick.get('beta') or 0,
+        'pct': pick.get('pct_from_52w_low') or 0,
     }
 
-# 1. TOP HARVEST ALERT - Highest yield + closest ex-div (already sorted this way)
+# 1. TOP HARVEST ALERT - Highest yield + closest ex-div
 with col1:
-    if len(df) > 0 and 'code' in df.columns:
-        top_harvest = df.iloc[0]
-        info = get_stock_info(top_harvest)
+    if 'top_harvest' in headlines:
+        info = get_stock_info(headlines['top_harvest'])
         st.metric(
             "TOP HARVEST ALERT",
             f"{info['code']}",
@@ -138,13 +124,8 @@ with col1:
 
 # 2. BEST YIELD + PROXIMITY - Best yield-to-time ratio
 with col2:
-    if len(df) > 0 and 'dividend_yield' in df.columns and 'days_until_exdiv' in df.columns:
-        # Sort by yield descending, then days ascending
-        best_yield_proximity = df.sort_values(
-            by=['dividend_yield', 'days_until_exdiv'],
-            ascending=[False, True]
-        ).iloc[0]
-        info = get_stock_info(best_yield_proximity)
+    if 'best_yield_proximity' in headlines:
+        info = get_stock_info(headlines['best_yield_proximity'])
         st.metric(
             "BEST YIELD + PROXIMITY",
             f"{info['code']}",
@@ -156,12 +137,10 @@ with col2:
 
 # 3. RISK-ADJUSTED GEM - High yield + low beta
 with col3:
-    if len(df) > 0 and 'beta' in df.columns and 'dividend_yield' in df.columns:
-        # Find lowest beta among stocks with yield >= 3%
-        high_yield_stocks = df[df['dividend_yield'] >= 3.0]
-        if len(high_yield_stocks) > 0:
-            low_beta_high_yield = high_yield_stocks.loc[high_yield_stocks['beta'].idxmin()]
-            info = get_stock_info(low_beta_high_yield)
+    if 'risk_adjusted_gem' in headlines:
+        gem = headlines['risk_adjusted_gem']
+        info = get_stock_info(gem)
+        if gem.get('high_yield'):
             st.metric(
                 "RISK-ADJUSTED GEM",
                 f"{info['code']}",
@@ -170,8 +149,6 @@ with col3:
             )
         else:
             # Fallback: just lowest beta overall
-            low_beta_high_yield = df.loc[df['beta'].idxmin()]
-            info = get_stock_info(low_beta_high_yield)
             st.metric(
                 "RISK-ADJUSTED GEM",
                 f"{info['code']}",
@@ -183,9 +160,8 @@ with col3:
 
 # 4. MOMENTUM DIVER - Deep discount from 52w low
 with col4:
-    if len(df) > 0 and 'pct_from_52w_low' in df.columns:
-        momentum_diver = df.loc[df['pct_from_52w_low'].idxmax()]
-        info = get_stock_info(momentum_diver)
+    if 'momentum_diver' in headlines:
+        info = get_stock_info(headlines['momentum_diver'])
         st.metric(
             "MOMENTUM DIVER",
             f"{info['code']}",
@@ -204,6 +180,8 @@ if 'dividend_yield' in df.columns:
     format_dict['dividend_yield'] = '{:.2f}%'
 if 'days_until_exdiv' in df.columns:
     format_dict['days_until_exdiv'] = '{:.0f}d'
+if 'trading_days_until_exdiv' in df.columns:
+    format_dict['trading_days_until_exdiv'] = '{:.0f}d'
 if 'market_capitalization' in df.columns:
     format_dict['market_capitalization'] = '{:.1f}B'
 if 'volume_avg_30d' in df.columns:
@@ -222,13 +200,18 @@ if '52_week_high' in df.columns:
     format_dict['52_week_high'] = '{:.2f}'  # Reduced from 6 decimals
 if '52_week_low' in df.columns:
     format_dict['52_week_low'] = '{:.2f}'  # Reduced from 6 decimals
+if 'dividend_cagr_5y' in df.columns:
+    format_dict['dividend_cagr_5y'] = '{:+.1f}%'
+if 'payment_regularity' in df.columns:
+    format_dict['payment_regularity'] = '{:.0%}'
 
 # Format dates before styling (convert to date-only strings)
-if 'next_div_date' in df.columns:
-    if pd.api.types.is_datetime64_any_dtype(df['next_div_date']):
-        df['next_div_date'] = df['next_div_date'].dt.strftime('%Y-%m-%d')
-    else:
-        df['next_div_date'] = pd.to_datetime(df['next_div_date'], errors='coerce').dt.strftime('%Y-%m-%d')
+for date_col in ['next_div_date', 'last_buy_date', 'earliest_sell_date']:
+    if date_col in df.columns:
+        if pd.api.types.is_datetime64_any_dtype(df[date_col]):
+            df[date_col] = df[date_col].dt.strftime('%Y-%m-%d')
+        else:
+            df[date_col] = pd.to_datetime(df[date_col], errors='coerce').dt.strftime('%Y-%m-%d')
 
 # Convert payout_ratio from decimal to percentage (0.5447 → 54.47%)
 # This must be done before creating display_df since format_dict expects percentage
@@ -246,7 +229,10 @@ desired_order = [
     '52_week_high', '52_week_low', 'pct_from_52w_low',  # Price comparison group
     'market_capitalization', 'dividend_yield', 'payout_ratio', 
     'pe_ratio', 'earnings_share', 'beta', 'volume_avg_30d',
-    'next_div_date', 'days_until_exdiv'
+    'next_div_date', 'days_until_exdiv', 'trading_days_until_exdiv',
+    'last_buy_date', 'earliest_sell_date',
+    'dividend_growth_years', 'dividend_cagr_5y', 'dividend_cuts', 'payment_regularity',
+    'quote_source'
 ]
 
 # Get columns that exist in the dataframe
@@ -271,6 +257,12 @@ if 'days_until_exdiv' in display_df.columns:
     styled = styled.bar(subset=['days_until_exdiv'], color='#ffaa00')
 
 
+# Rows served from the quote snapshot because the live fetch failed
+if 'quote_source' in df.columns:
+    stale_count = int((df['quote_source'] == 'local').sum())
+    if stale_count:
+        st.caption(f"⚠️ {stale_count} stocks use the saved quote snapshot (live fetch failed) - see quote_source")
+
 # Display styled dataframe
 st.dataframe(styled, use_container_width=True, height=600)
 
@@ -0,0 +1,30 @@
+# atomic_io.py — ATOMIC FILE WRITES FOR EVERYTHING THE PIPELINE PUBLISHES
+
+import json
+import os
+
+
+def atomic_write(path, write):
+    """
+    Write a file so readers only ever see the old or the new version.
+
+    `write(tmp_path)` writes the full content to a temp file next to `path`,
+    which then replaces `path` in one rename.
+    """
+    path = os.fspath(path)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_file = path + ".tmp"
+    try:
+        write(tmp_file)
+        os.replace(tmp_file, path)
+    finally:
+        if os.path.exists(tmp_file):
+            os.remove(tmp_file)
+
+
+def write_json(path, data, **kwargs):
+    """json.dump `data` to `path` atomically"""
+    def write(tmp_file):
+        with open(tmp_file, 'w') as f:
+            json.dump(data, f, **kwargs)
+    atomic_write(path, write)
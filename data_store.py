@@ -0,0 +1,126 @@
+# data_store.py — PROCESS-WIDE DASHBOARD DATA, HOT-SWAPPED BY A FILE WATCHER
+
+import json
+import threading
+from dataclasses import dataclass, field, replace
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+
+# File paths
+LATEST_FILE = "data/latest.json"
+HEADLINES_FILE = "data/headlines.json"  # Written just before latest.json by the pipeline
+META_FILE = "data/latest_meta.json"  # Scan status (partial or not), also written just before latest.json
+WATCH_INTERVAL_SECONDS = 5  # How often the watcher stats the data file
+
+
+def load_latest(path=LATEST_FILE) -> pd.DataFrame:
+    """Read the published harvest file into a display-ready frame (no API calls)"""
+    with open(path, 'r') as f:
+        data = json.load(f)
+    df = pd.DataFrame(data)
+    # Convert date strings back to datetime
+    if 'next_div_date' in df.columns:
+        df['next_div_date'] = pd.to_datetime(df['next_div_date'], errors='coerce')
+    # Convert ex_dividend_date from Unix timestamp to datetime (if it's numeric)
+    if 'ex_dividend_date' in df.columns:
+        # Check if it's already a datetime or still a Unix timestamp
+        if pd.api.types.is_numeric_dtype(df['ex_dividend_date']):
+            df['ex_dividend_date'] = pd.to_datetime(df['ex_dividend_date'], unit='s', errors='coerce')
+        else:
+            df['ex_dividend_date'] = pd.to_datetime(df['ex_dividend_date'], errors='coerce')
+    return df
+
+
+def _load_optional_json(path) -> dict:
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def load_headlines(path=HEADLINES_FILE) -> dict:
+    """Precomputed metric-card picks ({} if the pipeline hasn't written any yet)"""
+    return _load_optional_json(path)
+
+
+def load_meta(path=META_FILE) -> dict:
+    """Status of the scan behind latest.json, e.g. {'partial': True, 'skipped_tickers': 40}"""
+    return _load_optional_json(path)
+
+
+@dataclass(frozen=True)
+class Snapshot:
+    """One immutable version of the data. Viewers hold on to it while a newer one loads."""
+    df: pd.DataFrame = field(default_factory=pd.DataFrame)
+    headlines: dict = field(default_factory=dict)
+    meta: dict = field(default_factory=dict)
+    file_mtime: float = None  # None = nothing loaded yet
+    loaded_at: datetime = None
+    error: str = None
+
+
+class DataStore:
+    """
+    Holds the current Snapshot for the whole process.
+
+    A daemon thread stats the data file every few seconds and, when it changes,
+    loads the new version off the request path and swaps the reference in one
+    assignment. Readers never block on a reload and never see a half-built frame.
+    """
+
+    def __init__(self, path=LATEST_FILE, headlines_path=HEADLINES_FILE, meta_path=META_FILE,
+                 interval=WATCH_INTERVAL_SECONDS):
+        self.path = Path(path)
+        self.headlines_path = Path(headlines_path)
+        self.meta_path = Path(meta_path)
+        self.interval = interval
+        self._snapshot = Snapshot()
+        self._ready = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self) -> "DataStore":
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._watch, name="data-store-watcher", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def snapshot(self) -> Snapshot:
+        return self._snapshot
+
+    def wait_until_ready(self, timeout: float = None) -> bool:
+        """Block until the first check has finished (only matters right after process start)"""
+        return self._ready.wait(timeout)
+
+    def check(self) -> bool:
+        """Reload if the file changed. Returns True if a new snapshot was swapped in."""
+        try:
+            mtime = self.path.stat().st_mtime
+        except FileNotFoundError:
+            return False
+        if mtime == self._snapshot.file_mtime:
+            return False
+        try:
+            df = load_latest(self.path)
+            headlines = load_headlines(self.headlines_path)
+            meta = load_meta(self.meta_path)
+        except Exception as e:
+            # Probably caught mid-write - keep serving the old version and retry next tick
+            self._snapshot = replace(self._snapshot, error=str(e))
+            return False
+        self._snapshot = Snapshot(df, headlines, meta, mtime, datetime.now())
+        return True
+
+    def _watch(self):
+        while not self._stop.is_set():
+            try:
+                self.check()
+            finally:
+                self._ready.set()
+            self._stop.wait(self.interval)
@@ -0,0 +1,198 @@
+# dividend_history.py — LOCAL DIVIDEND HISTORY + GROWTH METRICS
+
+import json
+import os
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+from atomic_io import write_json
+
+# File paths
+DIVIDEND_HISTORY_FILE = "data/dividend_history.json"  # {ticker: [[YYYY-MM-DD, amount], ...]}
+
+# Metric settings
+DIVIDEND_CAGR_YEARS = 5  # CAGR window (full calendar years)
+DIVIDEND_LOOKBACK_YEARS = 10  # Window for counting dividend cuts
+DIVIDEND_REGULARITY_YEARS = 5  # Window for payment regularity
+DIVIDEND_CUT_TOLERANCE = 0.01  # Annual drop > 1% counts as a cut (absorbs FX/rounding noise)
+DIVIDEND_GAP_TOLERANCE = 1.5  # New payment > 1.5x the usual spacing after the last stored one = payments were missed
+
+METRIC_COLUMNS = ['dividend_growth_years', 'dividend_cagr_5y', 'dividend_cuts', 'payment_regularity']
+
+
+def load_dividend_history() -> dict:
+    """Load the local dividend store"""
+    if not os.path.exists(DIVIDEND_HISTORY_FILE):
+        return {}
+    try:
+        with open(DIVIDEND_HISTORY_FILE, 'r') as f:
+            return json.load(f)
+    except Exception:
+        return {}
+
+
+def save_dividend_history(history: dict):
+    """Write the dividend store atomically so a killed run never leaves a half-written file"""
+    write_json(DIVIDEND_HISTORY_FILE, history, sort_keys=True)
+
+
+def _pull_payments(fetch_dividends) -> list:
+    """Full series as [[YYYY-MM-DD, amount], ...]; [] if the pull failed or came back empty"""
+    try:
+        divs = fetch_dividends()
+    except Exception:
+        return []
+    if divs is None or len(divs) == 0:
+        return []  # Throttled - yfinance returns an empty series instead of raising
+    index = pd.DatetimeIndex(divs.index)
+    if index.tz is not None:
+        index = index.tz_localize(None)
+    return [[d.strftime('%Y-%m-%d'), float(amount)]
+            for d, amount in zip(index, divs.values) if amount > 0]
+
+
+def _missed_payments(payments: list, paid_on: str) -> bool:
+    """True if `paid_on` comes later than the ticker's usual spacing allows - something in between is missing"""
+    if len(payments) < 2:
+        return True  # No spacing to go by - re-pull to be safe
+    dates = pd.to_datetime([d for d, _ in payments])
+    usual = pd.Series(dates).diff().dt.days.median()
+    gap = (pd.Timestamp(paid_on) - dates[-1]).days
+    return gap > usual * DIVIDEND_GAP_TOLERANCE
+
+
+def update_dividend_history(history: dict, code: str, info: dict, fetch_dividends) -> bool:
+    """
+    Add any new payments for one ticker to the store (in place).
+
+    First time a ticker is seen, its full series is pulled once via `fetch_dividends()`.
+    Only call this for tickers that pay a dividend: an empty series is taken as a
+    throttled response and retried next run rather than seeded.
+    After that, `info['lastDividendDate']`/`info['lastDividendValue']` (from the `info`
+    call we already make) top it up - unless that payment lands further after the last
+    stored one than the ticker's usual spacing (e.g. it dropped off the qualified list
+    for a while), in which case the full series is pulled again so no payment is lost.
+
+    Returns True if the store changed.
+    """
+    if code not in history:
+        payments = _pull_payments(fetch_dividends)
+        if not payments:
+            return False  # Try again next run - seeding [] would freeze a wrong history for good
+        history[code] = payments
+        return True
+
+    last_ts = info.get('lastDividendDate')
+    last_value = info.get('lastDividendValue')
+    if not last_ts or not last_value:
+        return False
+
+    paid_on = pd.to_datetime(last_ts, unit='s').strftime('%Y-%m-%d')
+    payments = history[code]
+    if payments and paid_on <= payments[-1][0]:
+        return False
+    if _missed_payments(payments, paid_on):
+        pulled = _pull_payments(fetch_dividends)
+        if not pulled:
+            return False  # Keep the gap visible so the next run retries the pull
+        if paid_on > pulled[-1][0]:
+            pulled.append([paid_on, float(last_value)])  # Series can lag the info call by a day or two
+        history[code] = pulled
+        return pulled != payments
+    payments.append([paid_on, float(last_value)])
+    return True
+
+
+def history_to_frame(history: dict) -> pd.DataFrame:
+    """Flatten the store into one long frame: ticker, date, amount"""
+    rows = [(code, paid_on, amount) for code, payments in history.items() for paid_on, amount in payments]
+    df = pd.DataFrame(rows, columns=['ticker', 'date', 'amount'])
+    df['date'] = pd.to_datetime(df['date'])
+    return df
+
+
+def compute_dividend_metrics(history: dict, as_of: date) -> pd.DataFrame:
+    """
+    Compute dividend quality metrics for every ticker in the store at once.
+
+    Works on a (ticker x year) matrix of full calendar years, so the whole
+    universe is scored with numpy array ops instead of a per-ticker loop.
+
+    Columns (indexed by ticker):
+        dividend_growth_years: consecutive years of higher annual dividends, ending last full year
+        dividend_cagr_5y: 5-year annual dividend growth rate, as a percentage (NaN if not computable)
+        dividend_cuts: years in the last 10 where the annual dividend dropped
+        payment_regularity: share of the last 5 years with the usual number of payments (0-1)
+    """
+    tickers = sorted(history)
+    if not tickers:
+        return pd.DataFrame(columns=METRIC_COLUMNS, index=pd.Index([], name='ticker'))
+
+    last_full_year = as_of.year - 1
+    window = max(DIVIDEND_CAGR_YEARS + 1, DIVIDEND_LOOKBACK_YEARS + 1, DIVIDEND_REGULARITY_YEARS)
+
+    payments = history_to_frame(history)
+    payments['year'] = payments['date'].dt.year
+    payments = payments[payments['year'] <= last_full_year]
+    first_year = min(payments['year'].min(), last_full_year - window + 1) if not payments.empty else last_full_year - window + 1
+    years = range(int(first_year), last_full_year + 1)
+
+    annual = (payments.pivot_table(index='ticker', columns='year', values='amount', aggfunc='sum', fill_value=0)
+              .reindex(index=tickers, columns=years, fill_value=0)
+              .to_numpy(dtype=float))
+    counts = (payments.pivot_table(index='ticker', columns='year', values='amount', aggfunc='count', fill_value=0)
+              .reindex(index=tickers, columns=years, fill_value=0)
+              .to_numpy(dtype=float))
+
+    prev, curr = annual[:, :-1], annual[:, 1:]
+
+    # Growth streak: count trailing year-over-year increases (a first-ever payment doesn't count)
+    rising = (curr > prev) & (prev > 0)
+    growth_years = np.cumprod(rising[:, ::-1], axis=1).sum(axis=1)
+
+    # CAGR over the last N full years, only when both ends paid something
+    start, end = annual[:, -(DIVIDEND_CAGR_YEARS + 1)], annual[:, -1]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cagr = np.where((start > 0) & (end > 0), (end / start) ** (1 / DIVIDEND_CAGR_YEARS) - 1, np.nan)
+
+    # Cuts: annual total fell by more than the tolerance within the lookback window
+    cut = (curr < prev * (1 - DIVIDEND_CUT_TOLERANCE)) & (prev > 0)
+    cuts = cut[:, -DIVIDEND_LOOKBACK_YEARS:].sum(axis=1)
+
+    # Regularity: share of recent years matching the ticker's median payment count
+    recent = counts[:, -DIVIDEND_REGULARITY_YEARS:]
+    usual = np.median(recent, axis=1, keepdims=True)
+    regularity = np.where(usual[:, 0] > 0, (recent == usual).mean(axis=1), 0.0)
+
+    return pd.DataFrame({
+        'dividend_growth_years': growth_years.astype(int),
+        'dividend_cagr_5y': np.round(cagr * 100, 2),
+        'dividend_cuts': cuts.astype(int),
+        'payment_regularity': np.round(regularity, 2),
+    }, index=pd.Index(tickers, name='ticker'))
+
+
+def dividend_history_mask(df: pd.DataFrame, min_growth_years=None, min_dividend_cagr=None,
+                          max_dividend_cuts=None, min_payment_regularity=None) -> pd.Series:
+    """
+    Boolean mask for the optional dividend-history criteria.
+
+    Each criterion is skipped when None. When set, rows without history (NaN) fail it.
+    `min_dividend_cagr` is a percentage, matching the `dividend_cagr_5y` column.
+    """
+    mask = pd.Series(True, index=df.index)
+    criteria = [
+        ('dividend_growth_years', min_growth_years, 'min'),
+        ('dividend_cagr_5y', min_dividend_cagr, 'min'),
+        ('dividend_cuts', max_dividend_cuts, 'max'),
+        ('payment_regularity', min_payment_regularity, 'min'),
+    ]
+    for column, limit, kind in criteria:
+        if limit is None:
+            continue
+        if column not in df.columns:
+            return pd.Series(False, index=df.index)
+        mask &= (df[column] >= limit) if kind == 'min' else (df[column] <= limit)
+    return mask
@@ -0,0 +1,91 @@
+# priority_scan.py — DEADLINE-AWARE SCAN ORDER
+
+import heapq
+import json
+import os
+from datetime import date, datetime, timezone
+
+import numpy as np
+
+from atomic_io import write_json
+from trading_calendar import exchange_for, session_calendar
+
+# File paths
+SCAN_STATE_FILE = "data/scan_state.json"  # Last-seen snapshot per ticker + tickers skipped last run + partial flag
+
+UNKNOWN_DAYS = 10**6  # Sorts unknown/past ex-div dates last
+MAX_SKIPPED_RUNS = 3  # Skipped this many runs in a row → fetched first, so nothing starves
+
+
+def load_scan_state() -> dict:
+    """Load last-seen snapshots, last run's skipped tickers and whether it was partial"""
+    state = {'last_seen': {}, 'skipped': [], 'skip_counts': {}}
+    if os.path.exists(SCAN_STATE_FILE):
+        try:
+            with open(SCAN_STATE_FILE, 'r') as f:
+                state.update(json.load(f))
+        except Exception:
+            pass
+    state.setdefault('partial', bool(state['skipped']))
+    return state
+
+
+def save_scan_state(state: dict):
+    """Write scan state atomically"""
+    write_json(SCAN_STATE_FILE, state, sort_keys=True)
+
+
+def scan_priority(code: str, state: dict, today: date, window: tuple, trading_days=False) -> tuple:
+    """
+    Sort key for one ticker (lower = fetch sooner).
+
+    window: the caller's (min, max) ex-div window, in exchange sessions if trading_days
+        (the same units the harvest filter will use), else calendar days.
+
+    1. Never seen, or skipped MAX_SKIPPED_RUNS runs in a row, go first
+    2. Fewest filters failed last time (ex-div window re-checked against today),
+       less one per consecutive skipped run - an aging bonus, not a jump to the front
+    3. Nearest known ex-dividend date
+    4. Highest last-seen yield
+    """
+    seen = state['last_seen'].get(code)
+    skipped_runs = state['skip_counts'].get(code, 0)
+    if seen is None or skipped_runs >= MAX_SKIPPED_RUNS:
+        return (0, 0, 0, 0.0, code)
+
+    days = UNKNOWN_DAYS
+    if seen.get('ex_dividend_date'):
+        ex_date = datetime.fromtimestamp(seen['ex_dividend_date'], timezone.utc).date()
+        if trading_days:
+            days = int(np.busday_count(today, ex_date, busdaycal=session_calendar(exchange_for(code), today.year)))
+        else:
+            days = (ex_date - today).days
+        if days < window[0]:
+            days = UNKNOWN_DAYS  # Already passed - next date not known yet
+
+    failed = seen.get('fundamentals_failed')
+    if failed is None:
+        failed = UNKNOWN_DAYS  # No ex-div data last time - never produced a row
+    failed += 0 if window[0] <= days <= window[1] else 1
+    failed = max(0, failed - skipped_runs)
+
+    return (1, failed, days, -(seen.get('dividend_yield') or 0), code)
+
+
+def build_scan_queue(tickers: list, state: dict, today: date, window: tuple, trading_days=False) -> list:
+    """Heap of (priority, ticker); pop with heapq.heappop"""
+    queue = [(scan_priority(code, state, today, window, trading_days), code) for code in tickers]
+    heapq.heapify(queue)
+    return queue
+
+
+def drain_scan_queue(queue: list) -> list:
+    """Remaining tickers in priority order"""
+    return [heapq.heappop(queue)[1] for _ in range(len(queue))]
+
+
+def record_skipped(state: dict, skipped: list):
+    """Store this run's skipped tickers and how many runs in a row each has been skipped"""
+    counts = state['skip_counts']
+    state['skipped'] = skipped
+    state['skip_counts'] = {code: counts.get(code, 0) + 1 for code in skipped}
@@ -0,0 +1,307 @@
+# providers.py — PLUGGABLE QUOTE PROVIDERS WITH FALLBACK + HEDGED REQUESTS
+
+import json
+import os
+from abc import ABC, abstractmethod
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+import pandas as pd
+import yfinance as yf
+
+from atomic_io import write_json
+
+# File paths
+LOCAL_QUOTES_FILE = "data/quotes_snapshot.json"  # Last good quote per ticker, used as a last-resort fallback
+MAX_SNAPSHOT_AGE_HOURS = 96  # Older snapshot quotes are refused even as a fallback (covers a long weekend)
+
+# Routing settings
+HEDGE_PERCENTILE = 95  # Fire a hedged request once the primary is slower than this latency percentile
+HEDGE_MIN_SAMPLES = 20  # Need this many latency samples before hedging
+MAX_ERROR_RATE = 0.5  # Above this recent error rate a provider is demoted to the back of the line
+PROVIDER_COOLDOWN_SECONDS = 300  # Demoted providers get retried after this long without errors
+STATS_WINDOW = 100  # Recent calls kept per provider
+
+# Fields the screener reads, named as in yfinance's `info`
+FIELDS = [
+    'longName', 'previousClose', 'marketCap', 'dividendYield', 'payoutRatio',
+    'trailingPE', 'trailingEps', 'beta', 'averageVolume',
+    'fiftyTwoWeekHigh', 'fiftyTwoWeekLow', 'exDividendDate',
+    'lastDividendDate', 'lastDividendValue',
+]
+
+
+class ProviderError(Exception):
+    """A provider couldn't return usable data for a ticker"""
+
+
+class QuoteProvider(ABC):
+    """
+    Base class for a data source.
+
+    Subclasses implement `fetch_raw()`; `FIELD_MAP` maps our field names (FIELDS)
+    to the source's own keys, so every provider returns the same dict shape.
+    `live = False` marks a snapshot of earlier data: never raced against live
+    sources, only used once they have all failed.
+    """
+    name = "base"
+    live = True
+    FIELD_MAP = {field: field for field in FIELDS}
+
+    @abstractmethod
+    def fetch_raw(self, code: str) -> dict:
+        """The source's own record for one ticker; raise ProviderError if there is none"""
+
+    def fetch(self, code: str) -> dict:
+        raw = self.fetch_raw(code)
+        return {field: raw[key] for field, key in self.FIELD_MAP.items() if raw.get(key) is not None}
+
+    def dividends(self, code: str) -> pd.Series:
+        """Full dividend series indexed by ex-date"""
+        raise ProviderError(f"{self.name} has no dividend history")
+
+    def prices(self, codes: list) -> dict:
+        """Latest trade price for many tickers in one request: {ticker: price}"""
+        raise ProviderError(f"{self.name} has no live prices")
+
+
+class YFinanceProvider(QuoteProvider):
+    name = "yfinance"
+
+    def fetch_raw(self, code: str) -> dict:
+        info = yf.Ticker(code).info
+        # Rate limited responses come back as an (almost) empty dict
+        if not info or len(info) < 5:
+            raise ProviderError(f"empty response for {code} (rate limited?)")
+        return info
+
+    def dividends(self, code: str) -> pd.Series:
+        return yf.Ticker(code).dividends
+
+    def prices(self, codes: list) -> dict:
+        # One bulk download of today's 1-minute bars instead of an `info` call per ticker
+        bars = yf.download(codes, period="1d", interval="1m", progress=False, auto_adjust=False)
+        if bars is None or bars.empty:
+            raise ProviderError("no intraday bars (market closed or rate limited?)")
+        close = bars['Close']
+        if isinstance(close, pd.Series):
+            close = close.to_frame(codes[0])
+        last = close.ffill().iloc[-1].dropna()
+        return {code: float(price) for code, price in last.items()}
+
+
+class LocalFileProvider(QuoteProvider):
+    """Serves quotes from a JSON file of {ticker: {field: value}} - stale, so only up to max_age_hours old"""
+    name = "local"
+    live = False
+
+    def __init__(self, path=LOCAL_QUOTES_FILE, max_age_hours=MAX_SNAPSHOT_AGE_HOURS):
+        self.path = path
+        self.max_age_hours = max_age_hours
+        self._quotes = {}  # Missing file = no quotes
+        self._mtime = None  # mtime of the loaded file, None while it doesn't exist
+
+    def _load(self) -> dict:
+        mtime = os.path.getmtime(self.path) if os.path.exists(self.path) else None
+        if mtime != self._mtime:
+            self._quotes = {}
+            if mtime is not None:
+                with open(self.path, 'r') as f:
+                    self._quotes = json.load(f)
+            self._mtime = mtime
+        return self._quotes
+
+    def fetch_raw(self, code: str) -> dict:
+        quote = self._load().get(code)
+        if not quote:
+            raise ProviderError(f"{code} not in {self.path}")
+        age_hours = snapshot_age_hours(quote, self._mtime)
+        if age_hours > self.max_age_hours:
+            raise ProviderError(f"{code} snapshot is {age_hours:.0f}h old")
+        return quote
+
+
+def snapshot_age_hours(quote: dict, file_mtime: float) -> float:
+    """Age of one snapshot quote (quotes saved before the `_fetched_at` stamp count from the file mtime)"""
+    return (time.time() - quote.get('_fetched_at', file_mtime)) / 3600
+
+
+def save_local_quotes(quotes: dict, path=LOCAL_QUOTES_FILE):
+    """Merge fresh quotes into the local snapshot (atomic write), stamped with the time they were saved"""
+    merged = {}
+    if os.path.exists(path):
+        try:
+            with open(path, 'r') as f:
+                merged = json.load(f)
+        except Exception:
+            pass
+    now = time.time()
+    merged.update({code: {**quote, '_fetched_at': now} for code, quote in quotes.items()})
+    write_json(path, merged, sort_keys=True)
+
+
+class ProviderStats:
+    """Rolling latency and error record for one provider (thread-safe)"""
+
+    def __init__(self, window=STATS_WINDOW):
+        self._lock = threading.Lock()
+        self.latencies = deque(maxlen=window)  # Seconds, successful calls only
+        self.outcomes = deque(maxlen=window)  # True = error
+        self.last_error_at = None
+
+    def record(self, latency: float, error: bool):
+        with self._lock:
+            self.outcomes.append(error)
+            if error:
+                self.last_error_at = time.monotonic()
+            else:
+                self.latencies.append(latency)
+
+    def error_rate(self) -> float:
+        with self._lock:
+            return sum(self.outcomes) / len(self.outcomes) if self.outcomes else 0.0
+
+    def latency_percentile(self, pct: float):
+        """None until there are enough samples to trust"""
+        with self._lock:
+            if len(self.latencies) < HEDGE_MIN_SAMPLES:
+                return None
+            ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+    def is_healthy(self) -> bool:
+        if self.error_rate() <= MAX_ERROR_RATE:
+            return True
+        return self.last_error_at is None or time.monotonic() - self.last_error_at > PROVIDER_COOLDOWN_SECONDS
+
+    def summary(self) -> dict:
+        p50 = self.latency_percentile(50)
+        return {'calls': len(self.outcomes), 'error_rate': round(self.error_rate(), 3),
+                'p50_latency': round(p50, 3) if p50 is not None else None}
+
+
+class ProviderRouter:
+    """
+    Fetches a ticker from the best available provider.
+
+    Live providers are tried in the configured order, with unhealthy ones (high
+    recent error rate) moved to the back. If a call runs past that provider's
+    latency percentile, a hedged duplicate request goes to the next live provider
+    (or, with only one, to the same provider again) and the first good answer wins.
+    A failed call falls through to the next live provider. Snapshot providers
+    (`live = False`) are never hedged to - they are a last resort, and only when
+    the caller accepts stale data.
+    """
+
+    def __init__(self, providers: list, hedge_percentile=HEDGE_PERCENTILE):
+        self.providers = list(providers)
+        self.hedge_percentile = hedge_percentile
+        self.stats = {p.name: ProviderStats() for p in self.providers}
+        self._pool = ThreadPoolExecutor(max_workers=2 * len(self.providers), thread_name_prefix="provider")
+
+    def ranked_providers(self) -> list:
+        return sorted(self.providers, key=lambda p: (not self.stats[p.name].is_healthy(), self.providers.index(p)))
+
+    def _timed_fetch(self, provider: QuoteProvider, code: str) -> tuple:
+        start = time.monotonic()
+        try:
+            info = provider.fetch(code)
+        except Exception:
+            self.stats[provider.name].record(time.monotonic() - start, error=True)
+            raise
+        self.stats[provider.name].record(time.monotonic() - start, error=False)
+        return info, provider.name
+
+    def fetch(self, code: str, allow_stale=True) -> tuple:
+        """
+        Returns (info, name of the provider that answered).
+
+        allow_stale: fall back to snapshot providers when every live one fails. Callers
+            with their own retry/backoff pass False so failures reach them.
+        """
+        ranked = self.ranked_providers()
+        live = [p for p in ranked if p.live]
+        waiting = live[1:]  # Live providers not tried yet
+        pending = {}  # future -> provider
+        errors = []
+        last = None  # Most recently launched provider
+
+        def launch(provider):
+            nonlocal last
+            last = provider
+            pending[self._pool.submit(self._timed_fetch, provider, code)] = provider
+
+        if live:
+            launch(live[0])
+        self_hedged = len(live) != 1  # A lone live provider may hedge against itself once
+        while pending:
+            # Hedge only if there's a live target and we know what "slow" looks like
+            hedge_after = None
+            if waiting or not self_hedged:
+                hedge_after = self.stats[last.name].latency_percentile(self.hedge_percentile)
+            done, _ = wait(pending, timeout=hedge_after, return_when=FIRST_COMPLETED)
+            if not done:
+                # Hedged request - the slow one keeps running
+                if waiting:
+                    launch(waiting.pop(0))
+                else:
+                    self_hedged = True
+                    launch(last)
+                continue
+            for future in done:
+                provider = pending.pop(future)
+                try:
+                    return future.result()
+                except Exception as e:
+                    errors.append(f"{provider.name}: {str(e)[:80]}")
+            if not pending and waiting:
+                launch(waiting.pop(0))  # Fallback
+
+        if allow_stale:
+            for provider in ranked:
+                if provider.live:
+                    continue
+                try:
+                    return self._timed_fetch(provider, code)
+                except Exception as e:
+                    errors.append(f"{provider.name}: {str(e)[:80]}")
+        raise ProviderError(f"all providers failed for {code} ({'; '.join(errors)})")
+
+    def dividends(self, code: str) -> pd.Series:
+        """Full dividend series from the first provider that has one (no hedging - runs once per ticker)"""
+        errors = []
+        for provider in self.ranked_providers():
+            try:
+                return provider.dividends(code)
+            except Exception as e:
+                errors.append(f"{provider.name}: {str(e)[:80]}")
+        raise ProviderError(f"no dividend history for {code} ({'; '.join(errors)})")
+
+    def prices(self, codes: list) -> tuple:
+        """
+        Bulk latest prices from the first provider that has them. Returns (prices, provider name).
+
+        Not recorded in the stats - one bulk call would skew the per-ticker latencies used for hedging.
+        """
+        errors = []
+        for provider in self.ranked_providers():
+            try:
+                return provider.prices(codes), provider.name
+            except Exception as e:
+                errors.append(f"{provider.name}: {str(e)[:80]}")
+        raise ProviderError(f"no prices ({'; '.join(errors)})")
+
+    def stats_summary(self) -> dict:
+        return {name: stats.summary() for name, stats in self.stats.items()}
+
+
+_router = None
+
+def get_provider_router() -> ProviderRouter:
+    """Shared router: yfinance live, local snapshot as the last-resort fallback"""
+    global _router
+    if _router is None:
+        _router = ProviderRouter([YFinanceProvider(), LocalFileProvider()])
+    return _router
@@ -0,0 +1,99 @@
+# ranking.py — COMPOSITE SCORES, TOP-K SELECTION + DASHBOARD HEADLINE PICKS
+
+import numpy as np
+import pandas as pd
+
+from atomic_io import write_json
+
+# File paths
+HEADLINES_FILE = "data/headlines.json"  # Dashboard metric cards, precomputed at pipeline time
+
+MAX_RESULTS = 100
+HEADLINE_MIN_YIELD = 3.0  # % - risk-adjusted gem must clear this (display units)
+
+
+def lexicographic(primary: pd.Series, secondary: pd.Series) -> pd.Series:
+    """Single score that orders by primary, then secondary (both higher = better)"""
+    # Dense rank keeps primary ties as equal integers; the secondary percentile rank stays below 1
+    return primary.rank(method='dense') + secondary.rank(pct=True) / 2
+
+
+# Every score: higher = better, computed on the whole frame at once
+SCORES = {
+    # Nearest ex-div first, then highest yield (the classic harvest order)
+    'harvest': lambda df: lexicographic(-df['days_until_exdiv'], df['dividend_yield']),
+    # Highest yield first, then nearest ex-div
+    'yield_then_proximity': lambda df: lexicographic(df['dividend_yield'], -df['days_until_exdiv']),
+    # Yield earned per day of waiting
+    'yield_per_day': lambda df: df['dividend_yield'] / df['days_until_exdiv'].clip(lower=1),
+    # Yield per unit of market risk (beta floored so near-zero betas don't explode)
+    'beta_adjusted_yield': lambda df: df['dividend_yield'] / df['beta'].clip(lower=0.25),
+    'momentum': lambda df: df['pct_from_52w_low'],
+    'low_beta': lambda df: -df['beta'],
+}
+
+
+def score(df: pd.DataFrame, rank_by='harvest') -> pd.Series:
+    """
+    Score every row.
+
+    rank_by: a name in SCORES, or {score_name: weight} for a weighted blend of
+        percentile ranks (so scores on different scales mix cleanly).
+    """
+    if isinstance(rank_by, str):
+        if rank_by not in SCORES:
+            raise ValueError(f"Unknown score '{rank_by}' (choose from {', '.join(SCORES)})")
+        return SCORES[rank_by](df)
+    total = pd.Series(0.0, index=df.index)
+    for name, weight in rank_by.items():
+        total += weight * score(df, name).rank(pct=True)
+    return total
+
+
+def top_k(df: pd.DataFrame, rank_by='harvest', k=MAX_RESULTS) -> pd.DataFrame:
+    """Best k rows by score, best first. Partial selection - only the k winners get sorted."""
+    if df.empty:
+        return df
+    values = score(df, rank_by).to_numpy(dtype=float)
+    values = np.where(np.isnan(values), -np.inf, values)
+    if k < len(values):
+        idx = np.argpartition(-values, k - 1)[:k]
+    else:
+        idx = np.arange(len(values))
+    idx = idx[np.argsort(-values[idx], kind='stable')]
+    return df.iloc[idx]
+
+
+def _pick(df: pd.DataFrame, rank_by) -> dict:
+    row = top_k(df, rank_by, k=1).iloc[0]
+    return {
+        'code': row.get('code'),
+        'dividend_yield': row.get('dividend_yield'),
+        'days_until_exdiv': row.get('days_until_exdiv'),
+        'beta': row.get('beta'),
+        'pct_from_52w_low': row.get('pct_from_52w_low'),
+    }
+
+
+def headline_picks(df: pd.DataFrame) -> dict:
+    """
+    The dashboard's four metric cards, on the final (display units) frame.
+
+    Computed once per pipeline run so the dashboard only looks them up.
+    """
+    if df.empty:
+        return {}
+    high_yield = df[df['dividend_yield'] >= HEADLINE_MIN_YIELD]
+    gem = _pick(high_yield if not high_yield.empty else df, 'low_beta')
+    gem['high_yield'] = not high_yield.empty
+    return {
+        'top_harvest': _pick(df, 'harvest'),
+        'best_yield_proximity': _pick(df, 'yield_then_proximity'),
+        'risk_adjusted_gem': gem,
+        'momentum_diver': _pick(df, 'momentum'),
+    }
+
+
+def save_headlines(headlines: dict, path=HEADLINES_FILE):
+    """Write headline picks atomically"""
+    write_json(path, headlines, default=float)
@@ -8,8 +8,11 @@ if sys.platform == 'win32':
     sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
 console = Console()
 
-from screener import get_dividend_harvest
+from screener import get_dividend_harvest, publish_results
+from watch import PriceWatcher, WATCH_INTERVAL_SECONDS
+from atomic_io import atomic_write
 from datetime import datetime
+import argparse
 import os
 import sys
 from pathlib import Path
@@ -20,33 +23,68 @@ TOP_N_DISPLAY = 10
 DISPLAY_COLS = ['code', 'name', 'dividend_yield', 'days_until_exdiv', 'close']
 
 
-def main() -> int:
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Alberta Dividend Harvest Machine")
+    parser.add_argument("--time-budget", type=float, default=None, metavar="SECONDS",
+                        help="Stop fetching after this many seconds and return best-effort results")
+    parser.add_argument("--watch", action="store_true",
+                        help="Keep running and refresh prices for the qualified shortlist intraday")
+    parser.add_argument("--interval", type=float, default=None, metavar="SECONDS",
+                        help="Watch mode poll interval (default 300)")
+    return parser.parse_args(argv)
+
+
+def save_outputs(df) -> Path:
+    """Write today's CSV export and the dashboard files, each atomically. Returns the CSV path."""
+    # Create exports directory
+    exports_path = Path(EXPORTS_DIR)
+    exports_path.mkdir(exist_ok=True)
+    
+    # Generate filename
+    filename = exports_path / f"DIVIDEND_HARVEST_{datetime.now():%Y-%m-%d}.csv"
+    
+    # Save to CSV
+    atomic_write(filename, lambda tmp_file: df.to_csv(tmp_file, index=False))
+    
+    # Also save latest data for Hugging Face app (JSON format)
+    data_path = Path("data")
+    data_path.mkdir(exist_ok=True)
+    latest_file = data_path / "latest.json"
+    publish_results(df, latest_file)
+    return filename
+
+
+def watch(interval=None) -> int:
+    """Intraday mode: refresh price-driven fields for the shortlist until interrupted"""
+    console.print("[bold green]👀 Starting intraday watch...[/bold green]")
+    watcher = PriceWatcher(publish=save_outputs)
+    try:
+        watcher.run(interval or WATCH_INTERVAL_SECONDS)
+    except KeyboardInterrupt:
+        console.print("\n[bold yellow]⚠️  Watch stopped[/bold yellow]")
+    return 0
+
+
+def main(argv=None) -> int:
     """Main execution - returns exit code (0 = success, 1 = error)"""
+    args = parse_args(argv)
+    if args.watch:
+        return watch(args.interval)
     try:
         # Fetch data
         console.print("[bold green]🚀 Starting dividend harvest...[/bold green]")
-        df = get_dividend_harvest()
+        df = get_dividend_harvest(time_budget=args.time_budget)
+        
+        if df.attrs.get('partial'):
+            skipped = df.attrs.get('skipped_tickers', [])
+            console.print(f"[bold yellow]⏰ Partial scan: {len(skipped)} tickers skipped, moved up for next run[/bold yellow]")
         
         # Validate we got data
         if df.empty:
             console.print("[bold yellow]⚠️  No stocks found matching criteria[/bold yellow]")
             return 1
         
-        # Create exports directory
-        exports_path = Path(EXPORTS_DIR)
-        exports_path.mkdir(exist_ok=True)
-        
-        # Generate filename
-        filename = exports_path / f"DIVIDEND_HARVEST_{datetime.now():%Y-%m-%d}.csv"
-        
-        # Save to CSV
-        df.to_csv(filename, index=False)
-        
-        # Also save latest data for Hugging Face app (JSON format)
-        data_path = Path("data")
-        data_path.mkdir(exist_ok=True)
-        latest_file = data_path / "latest.json"
-        df.to_json(latest_file, orient="records", date_format="iso")
+        filename = save_outputs(df)
         
         # Verify file was created
         if not filename.exists():
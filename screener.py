@@ -1,13 +1,22 @@
 # screener.py — HUGGING FACE + LOCAL PROOF — 41+ STOCKS GUARANTEED
 
-import yfinance as yf
 import pandas as pd
-from datetime import datetime
+from datetime import datetime, timezone
 from rich.console import Console
 import time
 import json
 import os
 from pathlib import Path
+from atomic_io import atomic_write, write_json
+from dividend_history import (
+    load_dividend_history, save_dividend_history, update_dividend_history,
+    compute_dividend_metrics, dividend_history_mask,
+)
+from providers import get_provider_router, save_local_quotes, ProviderError
+from ranking import top_k, headline_picks, save_headlines, MAX_RESULTS
+from trading_calendar import exchange_for, add_trading_columns
+from priority_scan import load_scan_state, save_scan_state, build_scan_queue, drain_scan_queue, record_skipped
+import heapq
 
 # Initialize console (works in headless environments)
 try:
@@ -20,10 +29,15 @@ except Exception:
     console = DummyConsole()
 
 # File paths
-CACHE_FILE = "data/latest.json"
+CACHE_FILE = "data/latest.json"  # Published default selection - what the dashboard serves
+CANDIDATES_FILE = "data/candidates.json"  # Every fetched row before filters - the scan cache
 CACHE_HOURS = 23
 QUALIFIED_TICKERS_FILE = "data/qualified_tickers.json"  # Stocks that meet all criteria except ex-div date
+QUALIFIED_PROGRESS_FILE = "data/qualified_tickers_progress.json"  # Unfinished weekly rebuild, resumed next run
+LATEST_META_FILE = "data/latest_meta.json"  # Scan status behind latest.json (partial or not), for the dashboard
 QUALIFIED_TICKERS_REFRESH_DAYS = 7  # Refresh qualified list every 7 days
+EXDIV_MIN_DAYS = 1  # Exclude past/today (only future ex-div dates)
+EXDIV_MAX_DAYS = 60  # Within 60 days
 
 def get_all_tsx_tickers():
     """
@@ -62,8 +76,20 @@ def get_all_tsx_tickers():
         "WPM.TO", "WCP.TO", "WPK.TO", "WSP.TO"
     ]
 
-def get_qualified_tickers():
-    """Get list of qualified tickers (stocks that meet all criteria except ex-div date)"""
+def pause(seconds, deadline=None):
+    """time.sleep, but never past the deadline (time.monotonic() value)"""
+    if deadline is not None:
+        seconds = max(0, min(seconds, deadline - time.monotonic()))
+    time.sleep(seconds)
+
+def get_qualified_tickers(deadline=None):
+    """
+    Get list of qualified tickers (stocks that meet all criteria except ex-div date)
+
+    deadline: time.monotonic() value. If the weekly rebuild is still running then, its
+        progress is saved for the next run and the previous list (or, on a first run,
+        what qualified so far) is returned.
+    """
     # Check if qualified tickers file exists and is fresh
     if os.path.exists(QUALIFIED_TICKERS_FILE):
         age_days = (datetime.now() - datetime.fromtimestamp(os.path.getmtime(QUALIFIED_TICKERS_FILE))).total_seconds() / 86400
@@ -82,9 +108,10 @@ def get_qualified_tickers():
     
     all_tickers = get_all_tsx_tickers()
     qualified = []
+    router = get_provider_router()
     
     # Load existing progress if available (resume from failure)
-    progress_file = QUALIFIED_TICKERS_FILE.replace('.json', '_progress.json')
+    progress_file = QUALIFIED_PROGRESS_FILE
     if os.path.exists(progress_file):
         try:
             with open(progress_file, 'r') as f:
@@ -101,12 +128,22 @@ def get_qualified_tickers():
     max_consecutive_errors = 5
     
     for idx, code in enumerate(all_tickers[start_idx:], start=start_idx):
+        if deadline is not None and time.monotonic() >= deadline:
+            write_json(progress_file, {'qualified': qualified, 'last_index': idx})
+            console.print(f"⏰ Time budget ran out at ticker {idx}/{len(all_tickers)} - rebuild resumes next run", style="bold yellow")
+            if os.path.exists(QUALIFIED_TICKERS_FILE):
+                try:
+                    with open(QUALIFIED_TICKERS_FILE, 'r') as f:
+                        return json.load(f)
+                except Exception:
+                    pass
+            return qualified
+        
         if idx % 50 == 0:
             console.print(f"   Scanning {idx}/{len(all_tickers)}... ({len(qualified)} qualified so far)", style="dim")
             # Save progress every 50 tickers
             try:
-                with open(progress_file, 'w') as f:
-                    json.dump({'qualified': qualified, 'last_index': idx}, f)
+                write_json(progress_file, {'qualified': qualified, 'last_index': idx})
             except:
                 pass
         
@@ -115,20 +152,8 @@ def get_qualified_tickers():
         
         for attempt in range(retries):
             try:
-                ticker = yf.Ticker(code)
-                info = ticker.info
-                
-                # Check if we got rate limited (empty info dict)
-                if not info or len(info) < 5:
-                    if attempt < retries - 1:
-                        wait_time = 2.1 * (2 ** attempt)  # Exponential backoff: 2.1s, 4.2s, 8.4s
-                        console.print(f"   ⚠️ Rate limit detected, waiting {wait_time:.1f}s...", style="bold yellow")
-                        time.sleep(wait_time)
-                        continue
-                    else:
-                        console.print(f"   ❌ Rate limited on {code}, skipping...", style="bold red")
-                        consecutive_errors += 1
-                        break
+                # Live providers only - a snapshot answer would hide the rate limit from the backoff below
+                info, _ = router.fetch(code, allow_stale=False)
                 
                 # Must have dividend data
                 if not info.get('dividendYield'):
@@ -158,12 +183,22 @@ def get_qualified_tickers():
                 success = True
                 consecutive_errors = 0
                 break
+            
+            except ProviderError as e:
+                # Every live provider failed - usually Yahoo rate limiting (empty responses)
+                if attempt < retries - 1:
+                    wait_time = 2.1 * (2 ** attempt)  # Exponential backoff: 2.1s, 4.2s, 8.4s
+                    console.print(f"   ⚠️ Rate limit detected, waiting {wait_time:.1f}s...", style="bold yellow")
+                    pause(wait_time, deadline)
+                else:
+                    console.print(f"   ❌ Rate limited on {code}, skipping... ({str(e)[:80]})", style="bold red")
+                    consecutive_errors += 1
                 
             except Exception as e:
                 if attempt < retries - 1:
                     wait_time = 2.1 * (2 ** attempt)
                     console.print(f"   ⚠️ Error on {code} (attempt {attempt+1}/{retries}), retrying in {wait_time:.1f}s...", style="dim")
-                    time.sleep(wait_time)
+                    pause(wait_time, deadline)
                 else:
                     console.print(f"   ❌ Failed to fetch {code} after {retries} attempts: {str(e)[:50]}", style="dim")
                     consecutive_errors += 1
@@ -171,16 +206,14 @@ def get_qualified_tickers():
         # If too many consecutive errors, pause longer
         if consecutive_errors >= max_consecutive_errors:
             console.print(f"   ⚠️ {max_consecutive_errors} consecutive errors, pausing 30s...", style="bold yellow")
-            time.sleep(30)
+            pause(30, deadline)
             consecutive_errors = 0
         
         # Slightly longer delay for full scan to be extra safe
-        time.sleep(2.5)
+        pause(2.5, deadline)
     
     # Save qualified list
-    os.makedirs("data", exist_ok=True)
-    with open(QUALIFIED_TICKERS_FILE, 'w') as f:
-        json.dump(qualified, f)
+    write_json(QUALIFIED_TICKERS_FILE, qualified)
     
     # Clean up progress file
     if os.path.exists(progress_file):
@@ -192,98 +225,241 @@ def get_qualified_tickers():
     console.print(f"✅ Found {len(qualified)} qualified tickers (saved for future scans)", style="bold green")
     return qualified
 
-def get_dividend_harvest() -> pd.DataFrame:
-    # CACHE FIRST
-    if os.path.exists(CACHE_FILE):
-        age_hours = (datetime.now() - datetime.fromtimestamp(os.path.getmtime(CACHE_FILE))).total_seconds() / 3600
-        if age_hours < CACHE_HOURS:
+def save_records_json(df: pd.DataFrame, path):
+    """Write records JSON atomically - the dashboard watcher never sees a half-written file"""
+    atomic_write(path, lambda tmp_file: df.to_json(tmp_file, orient="records", date_format="iso"))
+
+def publish_results(df: pd.DataFrame, path=CACHE_FILE, meta=None):
+    """
+    Write the dashboard's headline picks (and scan status, if given),
+    then the records file the dashboard watches
+    """
+    save_headlines(headline_picks(df))
+    if meta is not None:
+        write_json(LATEST_META_FILE, meta)
+    save_records_json(df, path)
+
+def to_display_code(code: str) -> str:
+    """Strip the .TO suffix and convert hyphens back to dots for cleaner display"""
+    return code.replace('.TO', '').replace('-', '.')
+
+def harvest_filter_checks(df: pd.DataFrame, exdiv_window=(EXDIV_MIN_DAYS, EXDIV_MAX_DAYS),
+                          day_column='days_until_exdiv') -> pd.DataFrame:
+    """One boolean column per harvest filter (True = passes)"""
+    return pd.DataFrame({
+        'market_cap': df['market_capitalization'] >= 1e9,
+        'dividend_yield': df['dividend_yield'] >= 0.03,  # 3% as decimal (0.03)
+        'earnings': df['earnings_share'] > 0,
+        'pe_ratio': df['pe_ratio'] < 25,
+        'payout_ratio': df['payout_ratio'] < 0.7,
+        'volume': df['volume_avg_30d'] > 300000,
+        'beta': df['beta'] < 1.5,
+        'exdiv_after_today': df[day_column] >= exdiv_window[0],
+        'exdiv_within_window': df[day_column] <= exdiv_window[1],
+        'pct_from_52w_low': df['pct_from_52w_low'] > 15,
+    }, index=df.index)
+
+EXDIV_CHECKS = ['exdiv_after_today', 'exdiv_within_window']
+
+def info_to_row(code: str, info: dict, source: str) -> dict:
+    """One screener row from a provider quote (Yahoo `info` field names) and the provider it came from"""
+    return {
+        'code': to_display_code(code),  # Clean code without .TO
+        'name': info.get('longName', code),
+        'close': info.get('previousClose', 0),
+        'market_capitalization': info.get('marketCap', 0),
+        # Yahoo returns dividendYield as percentage (4.59 = 4.59%), convert to decimal for filtering
+        'dividend_yield': (info.get('dividendYield') or 0) / 100,  # Store as decimal (0.0459 = 4.59%)
+        'payout_ratio': info.get('payoutRatio', 1),
+        'pe_ratio': info.get('trailingPE', 999),
+        'earnings_share': info.get('trailingEps', 0),
+        'beta': info.get('beta', 2),
+        'volume_avg_30d': info.get('averageVolume', 0),
+        '52_week_high': info.get('fiftyTwoWeekHigh', 0),
+        '52_week_low': info.get('fiftyTwoWeekLow', 0),
+        'ex_dividend_date': info.get('exDividendDate'),
+        'exchange': exchange_for(code),
+        'quote_source': source,  # 'local' = stale snapshot fallback, live fetch failed
+    }
+
+def pct_from_52w_low(df: pd.DataFrame) -> pd.Series:
+    return (df['close'] - df['52_week_low']) / df['52_week_low'].replace(0, 1) * 100
+
+def add_exdiv_columns(df: pd.DataFrame, today) -> pd.DataFrame:
+    """Calendar and trading days to ex-div, buy-by and sell dates - everything that moves with `today`"""
+    df['next_div_date'] = pd.to_datetime(df['ex_dividend_date'], unit='s', errors='coerce')
+    df['days_until_exdiv'] = (df['next_div_date'] - pd.Timestamp(today)).dt.days
+    return add_trading_columns(df, today)
+
+def prepare_candidates(df: pd.DataFrame, today, history: dict) -> pd.DataFrame:
+    """Add every derived column the filters and ranking need, for the whole frame at once"""
+    df['pct_from_52w_low'] = pct_from_52w_low(df)
+    df = add_exdiv_columns(df, today)
+    
+    # Dividend history metrics for the whole frame in one vectorized pass
+    metrics = compute_dividend_metrics(history, today).rename(index=to_display_code)
+    return df.join(metrics, on='code')
+
+def select_harvest(df: pd.DataFrame, checks: pd.DataFrame, history_criteria: dict,
+                   rank_by='harvest', max_results=MAX_RESULTS) -> pd.DataFrame:
+    """Rows passing every check and the dividend-history criteria, ranked and in display units"""
+    mask = checks.all(axis=1) & dividend_history_mask(df, **history_criteria)
+    return finalize_results(df[mask], rank_by, max_results)
+
+def finalize_results(df: pd.DataFrame, rank_by='harvest', max_results=MAX_RESULTS) -> pd.DataFrame:
+    """Rank passing rows and convert to display units"""
+    # Rank the full candidate set, then keep the best (not whichever came first)
+    result = top_k(df, rank_by, max_results).copy()
+    result['market_capitalization'] /= 1e9
+    result['volume_avg_30d'] /= 1000
+    
+    # NOW multiply by 100 for display (only once, at the very end)
+    result['dividend_yield'] = (result['dividend_yield'] * 100).round(2)
+    return result
+
+def get_dividend_harvest(min_growth_years=None, min_dividend_cagr=None,
+                         max_dividend_cuts=None, min_payment_regularity=None,
+                         time_budget=None, rank_by='harvest', max_results=MAX_RESULTS,
+                         exdiv_window=(EXDIV_MIN_DAYS, EXDIV_MAX_DAYS), trading_days=False) -> pd.DataFrame:
+    """
+    Scan qualified tickers and return harvest-ready stocks.
+
+    time_budget: seconds for the whole call, including a weekly qualified-list rebuild
+        (None = scan everything). Tickers are fetched most-relevant first; when the
+        budget runs out the result is built from what was fetched, with
+        df.attrs['partial'] = True and the unfetched tickers in df.attrs['skipped_tickers']
+        (moved up the queue for the next run). The flag is also saved in scan_state.json
+        and data/latest_meta.json.
+    rank_by: score name from ranking.SCORES, or {score_name: weight} for a blend.
+        Default 'harvest' = nearest ex-div first, then highest yield.
+    max_results: keep the best this many after ranking.
+    exdiv_window: (min, max) days until ex-dividend.
+    trading_days: count the window in exchange sessions (TSX/NYSE holidays, weekends)
+        instead of calendar days.
+
+    Optional dividend-history criteria (None = no filter):
+        min_growth_years: minimum consecutive years of dividend increases
+        min_dividend_cagr: minimum 5-year dividend CAGR, in percent
+        max_dividend_cuts: maximum dividend cuts in the last 10 years
+        min_payment_regularity: minimum payment regularity (0-1)
+    """
+    history_criteria = dict(
+        min_growth_years=min_growth_years,
+        min_dividend_cagr=min_dividend_cagr,
+        max_dividend_cuts=max_dividend_cuts,
+        min_payment_regularity=min_payment_regularity,
+    )
+
+    started_at = time.time()  # Snapshot quotes older than this were not refreshed by this scan
+    deadline = time.monotonic() + time_budget if time_budget is not None else None
+    day_column = 'trading_days_until_exdiv' if trading_days else 'days_until_exdiv'
+    # Use UTC date to match GitHub Actions timezone
+    today = datetime.now(timezone.utc).date()
+
+    # CACHE FIRST - the unfiltered candidates, so any criteria can be applied to them
+    if os.path.exists(CANDIDATES_FILE):
+        age_hours = (datetime.now() - datetime.fromtimestamp(os.path.getmtime(CANDIDATES_FILE))).total_seconds() / 3600
+        # A partial scan (time budget ran out) is never treated as fresh
+        if age_hours < CACHE_HOURS and not load_scan_state()['partial']:
             console.print(f"📦 Loaded cache ({age_hours:.1f}h old)", style="bold yellow")
             try:
-                df = pd.read_json(CACHE_FILE)
+                df = pd.read_json(CANDIDATES_FILE, dtype={'code': str})
+                # The cache may be from yesterday - count the window from today
+                df = add_exdiv_columns(df, today)
+                checks = harvest_filter_checks(df, exdiv_window, day_column)
+                df = select_harvest(df, checks, history_criteria, rank_by, max_results)
                 console.print(f"✅ Loaded {len(df)} stocks from cache", style="bold green")
                 return df
             except Exception as e:
                 console.print(f"⚠️ Cache load failed: {e}, fetching fresh...", style="bold yellow")
     
     # Get qualified tickers (will use cached list if available)
-    tickers_to_scan = get_qualified_tickers()
+    tickers_to_scan = get_qualified_tickers(deadline)
     
     console.print("🔄 Harvesting fresh data...", style="bold green")
-    # Use UTC date to match GitHub Actions timezone
-    from datetime import timezone
-    today = datetime.now(timezone.utc).date()
     results = []
+    row_codes = []  # Raw ticker for each row in results
+    history = load_dividend_history()
+    history_changed = False
+    router = get_provider_router()
+    fresh_quotes = {}  # Live (non-local) quotes, saved as the fallback snapshot
+    
+    # Most relevant tickers first, so a cut-short scan still has the names that matter
+    state = load_scan_state()
+    queue = build_scan_queue(tickers_to_scan, state, today, exdiv_window, trading_days)
     
-    for idx, code in enumerate(tickers_to_scan):
-        console.print(f"{idx+1}/{len(tickers_to_scan)} {code}...", style="dim")
+    idx = 0
+    while queue:
+        if deadline is not None and time.monotonic() >= deadline:
+            console.print(f"⏰ Time budget spent, skipping {len(queue)} tickers", style="bold yellow")
+            break
+        _, code = heapq.heappop(queue)
+        idx += 1
+        console.print(f"{idx}/{len(tickers_to_scan)} {code}...", style="dim")
         try:
-            ticker = yf.Ticker(code)
-            info = ticker.info
+            info, source = router.fetch(code)
+            if source != 'local':
+                fresh_quotes[code] = {**info, '_source': source}
             
-            ex_div = info.get('exDividendDate')
-            if not ex_div:
-                continue
+            # Full dividend series is pulled once per ticker, then topped up from info
+            # (non-payers are skipped - an empty series would look like a throttled pull)
+            pays_dividend = info.get('dividendYield') or info.get('exDividendDate')
+            if pays_dividend and update_dividend_history(history, code, info, lambda: router.dividends(code)):
+                history_changed = True
             
             # Yahoo returns dividendYield as percentage (4.59 = 4.59%), convert to decimal for filtering
             raw_yield = (info.get('dividendYield') or 0) / 100  # Convert 4.59% → 0.0459
             
-            # Store code without .TO suffix and convert hyphens back to dots for cleaner display
-            display_code = code.replace('.TO', '').replace('-', '.')
+            ex_div = info.get('exDividendDate')
+            state['last_seen'][code] = {'ex_dividend_date': ex_div, 'dividend_yield': raw_yield, 'fundamentals_failed': None}
+            if not ex_div:
+                continue
             
-            row = {
-                'code': display_code,  # Clean code without .TO
-                'name': info.get('longName', code),
-                'close': info.get('previousClose', 0),
-                'market_capitalization': info.get('marketCap', 0),
-                'dividend_yield': raw_yield,  # Store as decimal (0.0459 = 4.59%)
-                'payout_ratio': info.get('payoutRatio', 1),
-                'pe_ratio': info.get('trailingPE', 999),
-                'earnings_share': info.get('trailingEps', 0),
-                'beta': info.get('beta', 2),
-                'volume_avg_30d': info.get('averageVolume', 0),
-                '52_week_high': info.get('fiftyTwoWeekHigh', 0),
-                '52_week_low': info.get('fiftyTwoWeekLow', 0),
-                'ex_dividend_date': ex_div,
-            }
-            results.append(row)
+            results.append(info_to_row(code, info, source))
+            row_codes.append(code)
         except:
             pass
-        time.sleep(2.1)  # Yahoo loves us forever
+        if queue:
+            pause(2.1, deadline)  # Yahoo loves us forever
+    
+    if history_changed:
+        save_dividend_history(history)
+    if fresh_quotes:
+        save_local_quotes(fresh_quotes)
+    console.print(f"📡 Providers: {router.stats_summary()}", style="dim")
+    
+    skipped = drain_scan_queue(queue)
+    record_skipped(state, skipped)
+    # An unfinished qualified-list rebuild means tickers were never even queued
+    state['partial'] = bool(skipped) or os.path.exists(QUALIFIED_PROGRESS_FILE)
+    scan_attrs = {'partial': state['partial'], 'skipped_tickers': skipped}
     
     df = pd.DataFrame(results)
     if df.empty:
+        save_scan_state(state)
         console.print("⚠️ No data", style="bold red")
+        df.attrs.update(scan_attrs)
         return df
     
     console.print(f"✅ Got {len(df)} stocks before filters", style="bold green")
     
-    df['next_div_date'] = pd.to_datetime(df['ex_dividend_date'], unit='s', errors='coerce')
-    df['days_until_exdiv'] = (df['next_div_date'] - pd.Timestamp(today)).dt.days
-    df['pct_from_52w_low'] = ((df['close'] - df['52_week_low']) / df['52_week_low'].replace(0, 1) * 100)
+    df = prepare_candidates(df, today, history)
+    save_records_json(df, CANDIDATES_FILE)
     
-    mask = (
-        (df['market_capitalization'] >= 1e9) &
-        (df['dividend_yield'] >= 0.03) &  # 3% as decimal (0.03)
-        (df['earnings_share'] > 0) &
-        (df['pe_ratio'] < 25) &
-        (df['payout_ratio'] < 0.7) &
-        (df['volume_avg_30d'] > 300000) &
-        (df['beta'] < 1.5) &
-        (df['days_until_exdiv'] >= 1) &  # Exclude past/today (only future ex-div dates)
-        (df['days_until_exdiv'] <= 60) &  # Within 60 days
-        (df['pct_from_52w_low'] > 15)
-    )
+    checks = harvest_filter_checks(df, exdiv_window, day_column)
     
-    result = df[mask].copy().head(100)
-    result = result.sort_values(['days_until_exdiv', 'dividend_yield'], ascending=[True, False])
-    result['market_capitalization'] /= 1e9
-    result['volume_avg_30d'] /= 1000
+    # Remember how close each ticker came, for next run's scan order
+    fundamentals_failed = (~checks.drop(columns=EXDIV_CHECKS)).sum(axis=1)
+    for code, failed in zip(row_codes, fundamentals_failed):
+        state['last_seen'][code]['fundamentals_failed'] = int(failed)
+    save_scan_state(state)
     
-    # NOW multiply by 100 for display (only once, at the very end)
-    result['dividend_yield'] = (result['dividend_yield'] * 100).round(2)
+    # The dashboard always gets the default selection - custom criteria only shape the returned frame
+    meta = {'partial': state['partial'], 'skipped_tickers': len(skipped), 'started_at': started_at,
+            'scanned_at': datetime.now(timezone.utc).isoformat(timespec='seconds')}
+    publish_results(select_harvest(df, harvest_filter_checks(df), {}), CACHE_FILE, meta)
+    result = select_harvest(df, checks, history_criteria, rank_by, max_results)
     
-    # Save cache
-    os.makedirs("data", exist_ok=True)
-    result.to_json(CACHE_FILE, orient="records", date_format="iso")
     console.print(f"🎯 {len(result)} HARVEST-READY STOCKS", style="bold magenta")
+    result.attrs.update(scan_attrs)
     return result
@@ -2,8 +2,7 @@
 
 import streamlit as st
 from datetime import datetime
-from screener import get_dividend_harvest
-import pandas as pd
+from data_store import DataStore
 
 
 st.set_page_config(
@@ -24,15 +23,14 @@ st.markdown("""
 st.markdown("<h1 style='text-align: center; color: #2d4d2d;'>The Real Money Isn't Made by Catching Every Little Wave</h1>", unsafe_allow_html=True)
 st.markdown("<p style='text-align: center; color: #666;'>Wait for the Right Setup</p>", unsafe_allow_html=True)
 
-# Cache the data fetch to avoid refetching on every rerun
-@st.cache_data(ttl=300)  # Cache for 5 minutes
-def fetch_dividend_data():
-    """Fetch dividend data with error handling"""
-    try:
-        return get_dividend_harvest()
-    except Exception as e:
-        st.error(f"Error fetching data: {str(e)}")
-        return pd.DataFrame()
+# Shared per-process data store - a background watcher reloads data/latest.json
+# when run.py rewrites it. Viewers never trigger a Yahoo fetch.
+@st.cache_resource
+def get_data_store() -> DataStore:
+    return DataStore().start()
+
+
+store = get_data_store()
 
 
 # Sidebar for controls
@@ -40,16 +38,21 @@ with st.sidebar:
     st.header("⚙️ Controls")
     
     if st.button("🔄 Refresh Data", use_container_width=True):
-        st.cache_data.clear()
         st.rerun()
     
     st.divider()
     st.caption(f"Last updated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
 
 
-# Fetch data with loading state
-with st.spinner("🔄 Fetching fresh dividend data from Yahoo Finance..."):
-    df = fetch_dividend_data()
+# Current snapshot (only waits right after process start, before the first load)
+with st.spinner("🔄 Loading dividend data..."):
+    store.wait_until_ready(timeout=10)
+snapshot = store.snapshot()
+if snapshot.error:
+    st.error(f"Error loading data: {snapshot.error}")
+if snapshot.meta.get('partial'):
+    st.warning(f"⏰ Partial scan: the time budget ran out ({snapshot.meta.get('skipped_tickers', 0)} tickers unchecked); the next run picks up where it stopped")
+df = snapshot.df
 
 
 # Handle empty state
@@ -0,0 +1,146 @@
+# trading_calendar.py — TSX + NYSE SESSIONS, BUY-BY AND SETTLEMENT DATES
+
+from datetime import date, timedelta
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+# Holidays are precomputed for this many years around today
+CALENDAR_YEARS_BACK = 1
+CALENDAR_YEARS_AHEAD = 4
+
+SETTLEMENT_DAYS = 1  # T+1 (US since May 28 2024, Canada since May 27 2024)
+
+EXCHANGES = ['TSX', 'NYSE']
+
+
+def exchange_for(code: str) -> str:
+    """Yahoo ticker → exchange whose calendar applies"""
+    return 'TSX' if code.endswith('.TO') else 'NYSE'
+
+
+def _easter(year: int) -> date:
+    """Gregorian Easter Sunday (anonymous Gregorian algorithm)"""
+    a, b, c = year % 19, year // 100, year % 100
+    d, e = b // 4, b % 4
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = c // 4, c % 4
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    month = (h + l - 7 * m + 114) // 31
+    day = (h + l - 7 * m + 114) % 31 + 1
+    return date(year, month, day)
+
+
+def _nth_weekday(year: int, month: int, weekday: int, n: int) -> date:
+    """n-th given weekday of a month (Mon=0); n=-1 for the last one"""
+    if n > 0:
+        first = date(year, month, 1)
+        return first + timedelta(days=(weekday - first.weekday()) % 7 + 7 * (n - 1))
+    last = date(year, month + 1, 1) - timedelta(days=1) if month < 12 else date(year, 12, 31)
+    return last - timedelta(days=(last.weekday() - weekday) % 7)
+
+
+def _nearest_weekday(day: date) -> date:
+    """US rule: Saturday holiday observed Friday, Sunday holiday observed Monday"""
+    if day.weekday() == 5:
+        return day - timedelta(days=1)
+    if day.weekday() == 6:
+        return day + timedelta(days=1)
+    return day
+
+
+def _next_weekday(day: date) -> date:
+    """Canadian rule: weekend holiday observed the following Monday"""
+    while day.weekday() >= 5:
+        day += timedelta(days=1)
+    return day
+
+
+def nyse_holidays(year: int) -> list:
+    days = [
+        _nth_weekday(year, 1, 0, 3),  # Martin Luther King Jr. Day
+        _nth_weekday(year, 2, 0, 3),  # Presidents' Day
+        _easter(year) - timedelta(days=2),  # Good Friday
+        _nth_weekday(year, 5, 0, -1),  # Memorial Day
+        _nearest_weekday(date(year, 7, 4)),  # Independence Day
+        _nth_weekday(year, 9, 0, 1),  # Labor Day
+        _nth_weekday(year, 11, 3, 4),  # Thanksgiving
+        _nearest_weekday(date(year, 12, 25)),  # Christmas
+    ]
+    # New Year's Day on a Saturday is not moved back into December
+    if date(year, 1, 1).weekday() != 5:
+        days.append(_nearest_weekday(date(year, 1, 1)))
+    if year >= 2022:
+        days.append(_nearest_weekday(date(year, 6, 19)))  # Juneteenth
+    return days
+
+
+def tsx_holidays(year: int) -> list:
+    christmas = _next_weekday(date(year, 12, 25))
+    boxing_day = _next_weekday(max(date(year, 12, 26), christmas + timedelta(days=1)))
+    return [
+        _next_weekday(date(year, 1, 1)),  # New Year's Day
+        _nth_weekday(year, 2, 0, 3),  # Family Day
+        _easter(year) - timedelta(days=2),  # Good Friday
+        date(year, 5, 25) - timedelta(days=date(year, 5, 25).weekday() or 7),  # Victoria Day (Monday before May 25)
+        _next_weekday(date(year, 7, 1)),  # Canada Day
+        _nth_weekday(year, 8, 0, 1),  # Civic Holiday
+        _nth_weekday(year, 9, 0, 1),  # Labour Day
+        _nth_weekday(year, 10, 0, 2),  # Thanksgiving
+        christmas,
+        boxing_day,
+    ]
+
+
+HOLIDAY_RULES = {'TSX': tsx_holidays, 'NYSE': nyse_holidays}
+
+
+@lru_cache(maxsize=None)
+def holidays(exchange: str, first_year: int, last_year: int) -> np.ndarray:
+    """Sorted holiday array (datetime64[D]) for an exchange"""
+    days = [d for year in range(first_year, last_year + 1) for d in HOLIDAY_RULES[exchange](year)]
+    return np.array(sorted(set(days)), dtype='datetime64[D]')
+
+
+@lru_cache(maxsize=None)
+def session_calendar(exchange: str, around_year: int = None) -> np.busdaycalendar:
+    """Mon-Fri minus holidays, ready for numpy's vectorized busday functions"""
+    year = around_year or date.today().year
+    return np.busdaycalendar(holidays=holidays(exchange, year - CALENDAR_YEARS_BACK, year + CALENDAR_YEARS_AHEAD))
+
+
+def add_trading_columns(df: pd.DataFrame, today: date) -> pd.DataFrame:
+    """
+    Add trading-day columns for the whole frame, one numpy call per exchange.
+
+    Needs `exchange` and `next_div_date`. Adds:
+        trading_days_until_exdiv: sessions from today (inclusive) up to the ex-date - your buying window
+        last_buy_date: last session before the ex-date (T+1 settles on the record date)
+        earliest_sell_date: first session on/after the ex-date - selling then keeps the dividend
+    Rows without a valid ex-date get NaN/NaT.
+    """
+    ex_dates = df['next_div_date'].to_numpy(dtype='datetime64[D]')
+    valid = ~np.isnat(ex_dates)
+    start = np.datetime64(today, 'D')
+
+    trading_days = np.full(len(df), np.nan)
+    last_buy = np.full(len(df), np.datetime64('NaT'), dtype='datetime64[D]')
+    earliest_sell = np.full(len(df), np.datetime64('NaT'), dtype='datetime64[D]')
+
+    for exchange in EXCHANGES:
+        rows = valid & (df['exchange'] == exchange).to_numpy()
+        if not rows.any():
+            continue
+        cal = session_calendar(exchange, today.year)
+        trading_days[rows] = np.busday_count(start, ex_dates[rows], busdaycal=cal)
+        last_buy[rows] = np.busday_offset(ex_dates[rows], -SETTLEMENT_DAYS, roll='forward', busdaycal=cal)
+        earliest_sell[rows] = np.busday_offset(ex_dates[rows], 0, roll='forward', busdaycal=cal)
+
+    df['trading_days_until_exdiv'] = trading_days
+    df['last_buy_date'] = pd.to_datetime(last_buy)
+    df['earliest_sell_date'] = pd.to_datetime(earliest_sell)
+    return df
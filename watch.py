@@ -0,0 +1,174 @@
+# watch.py — INTRADAY PRICE REFRESH FOR THE QUALIFIED SHORTLIST
+
+import json
+import os
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+from dividend_history import load_dividend_history, DIVIDEND_HISTORY_FILE
+from providers import get_provider_router, snapshot_age_hours, LOCAL_QUOTES_FILE, MAX_SNAPSHOT_AGE_HOURS, ProviderError
+from ranking import MAX_RESULTS
+from screener import (
+    console, CACHE_FILE, LATEST_META_FILE, QUALIFIED_TICKERS_FILE, EXDIV_MIN_DAYS, EXDIV_MAX_DAYS,
+    info_to_row, prepare_candidates, harvest_filter_checks, pct_from_52w_low, finalize_results,
+)
+
+WATCH_INTERVAL_SECONDS = 300  # Default poll interval (5 min)
+PRICE_COLUMNS = ['close', '52_week_high', '52_week_low', 'pct_from_52w_low']  # The only fields a tick touches
+# A daily run rewrites these - any change means the in-memory fundamentals are out of date
+SOURCE_FILES = [QUALIFIED_TICKERS_FILE, LOCAL_QUOTES_FILE, DIVIDEND_HISTORY_FILE, CACHE_FILE]
+
+
+def load_shortlist() -> list:
+    """Qualified tickers from the last weekly scan (never triggers a rebuild)"""
+    if not os.path.exists(QUALIFIED_TICKERS_FILE):
+        return []
+    with open(QUALIFIED_TICKERS_FILE, 'r') as f:
+        return json.load(f)
+
+
+def source_mtimes() -> dict:
+    return {path: os.path.getmtime(path) if os.path.exists(path) else None for path in SOURCE_FILES}
+
+
+def last_scan_started() -> float:
+    """Start time (epoch) of the daily scan behind latest.json, None if unknown"""
+    try:
+        with open(LATEST_META_FILE, 'r') as f:
+            return json.load(f).get('started_at')
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def load_candidates(codes: list, today) -> pd.DataFrame:
+    """
+    Shortlist rows built from the last fetched fundamentals (data/quotes_snapshot.json),
+    indexed by Yahoo ticker. No network calls.
+
+    Same age cap as the scan's own snapshot fallback. Quotes the last daily scan did not
+    refresh (it served them from the snapshot, or skipped them) keep quote_source = 'local'.
+    """
+    quotes, mtime = {}, None
+    if os.path.exists(LOCAL_QUOTES_FILE):
+        mtime = os.path.getmtime(LOCAL_QUOTES_FILE)
+        with open(LOCAL_QUOTES_FILE, 'r') as f:
+            quotes = json.load(f)
+    kept = [code for code in codes
+            if quotes.get(code, {}).get('exDividendDate')
+            and snapshot_age_hours(quotes[code], mtime) <= MAX_SNAPSHOT_AGE_HOURS]
+    if not kept:
+        return pd.DataFrame()
+
+    scan_started = last_scan_started()
+
+    def source(quote):
+        if scan_started is not None and quote.get('_fetched_at', 0) < scan_started:
+            return 'local'
+        return quote.get('_source', 'local')
+
+    rows = [info_to_row(code, quotes[code], source(quotes[code])) for code in kept]
+    df = pd.DataFrame(rows, index=kept)
+    return prepare_candidates(df, today, load_dividend_history())
+
+
+class PriceWatcher:
+    """
+    Keeps the shortlist in memory and refreshes only its price-driven fields.
+
+    Each tick pulls one bulk quote for the shortlist, updates close / 52-week range /
+    pct_from_52w_low and the filter checks for the rows whose price moved, and calls
+    `publish(result)` only when the published result actually changes.
+    Fundamentals are never refetched - they are reloaded from disk at the date rollover
+    and whenever a daily run rewrites one of SOURCE_FILES.
+    """
+
+    def __init__(self, publish, rank_by='harvest', max_results=MAX_RESULTS,
+                 exdiv_window=(EXDIV_MIN_DAYS, EXDIV_MAX_DAYS), trading_days=False):
+        self.publish = publish
+        self.rank_by = rank_by
+        self.max_results = max_results
+        self.exdiv_window = exdiv_window
+        self.day_column = 'trading_days_until_exdiv' if trading_days else 'days_until_exdiv'
+        self.router = get_provider_router()
+        self.today = None
+        self.mtimes = None  # SOURCE_FILES mtimes the in-memory data was built from
+        self.df = pd.DataFrame()
+        self.checks = pd.DataFrame()
+        self.published = None
+        self.dirty = False  # Rebuilt since the last publish check
+
+    def rebuild(self, today):
+        """Reload fundamentals from disk - at start, on the date rollover and after a daily run"""
+        mtimes = source_mtimes()
+        df = load_candidates(load_shortlist(), today)
+        if not df.empty:
+            df[PRICE_COLUMNS] = df[PRICE_COLUMNS].astype(float)
+            self.checks = harvest_filter_checks(df, self.exdiv_window, self.day_column)
+        # Only marked as loaded once everything read cleanly, so a failed rebuild is retried next tick
+        self.df, self.today, self.mtimes = df, today, mtimes
+        self.dirty = True
+        self.published = None  # latest.json may no longer hold what we last wrote
+        console.print(f"👀 Watching {len(self.df)} shortlisted stocks", style="bold blue")
+
+    def apply_prices(self, prices: dict) -> pd.Index:
+        """Update price fields and re-check filters for rows whose price moved. Returns changed tickers."""
+        new = pd.Series(prices, dtype=float).reindex(self.df.index)
+        moved = new.notna() & (new != self.df['close'])
+        changed = self.df.index[moved]
+        if changed.empty:
+            return changed
+
+        price = new[changed]
+        low = self.df.loc[changed, '52_week_low']
+        self.df.loc[changed, 'close'] = price
+        self.df.loc[changed, '52_week_low'] = np.where(low > 0, np.minimum(low, price), low)
+        self.df.loc[changed, '52_week_high'] = np.maximum(self.df.loc[changed, '52_week_high'], price)
+        self.df.loc[changed, 'pct_from_52w_low'] = pct_from_52w_low(self.df.loc[changed])
+        self.checks.loc[changed] = harvest_filter_checks(self.df.loc[changed], self.exdiv_window, self.day_column)
+        return changed
+
+    def result(self) -> pd.DataFrame:
+        return finalize_results(self.df[self.checks.all(axis=1)], self.rank_by, self.max_results)
+
+    def tick(self) -> bool:
+        """One poll. Returns True if new results were published."""
+        today = datetime.now(timezone.utc).date()
+        if today != self.today or source_mtimes() != self.mtimes:
+            self.rebuild(today)
+        if self.df.empty:
+            return False
+
+        try:
+            prices, source = self.router.prices(list(self.df.index))
+        except ProviderError as e:
+            console.print(f"⚠️ No quotes this round: {e}", style="dim")
+            return False
+
+        changed = self.apply_prices(prices)
+        if changed.empty and not self.dirty:
+            return False
+
+        self.dirty = False
+        result = self.result()
+        if self.published is not None and result.equals(self.published):
+            return False
+        self.publish(result)
+        self.published = result
+        # Our own write to latest.json is not a new daily run
+        self.mtimes[CACHE_FILE] = source_mtimes()[CACHE_FILE]
+        console.print(f"💹 {len(changed)} prices moved ({source}) → {len(result)} harvest-ready", style="bold green")
+        return True
+
+    def run(self, interval=WATCH_INTERVAL_SECONDS):
+        """Poll forever. A failed tick is logged and retried next interval, never fatal."""
+        while True:
+            started = time.monotonic()
+            try:
+                self.tick()
+            except Exception as e:
+                # Bad file mid-rewrite, malformed quote, disk full... - keep watching
+                console.print(f"❌ Watch tick failed: {type(e).__name__}: {str(e)[:200]}", style="bold red")
+            time.sleep(max(0, interval - (time.monotonic() - started)))